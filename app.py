@@ -3,6 +3,7 @@ from flask import Flask, render_template, request, jsonify
 import core_logic
 import database
 
+database.init_db()
 app = Flask(__name__)
 
 @app.route('/')
@@ -4,28 +4,20 @@ import os
 import time
 import numpy as np
 import face_recognition
-from database import (init_db, add_student, record_attendance, get_all_students, 
+from database import (add_student, record_attendance, get_all_students, 
                       get_student_by_id, has_attended_today_in_period, 
                       record_participation, has_participated_recently)
 import threading
 import datetime
 
-# --- Intenta importar TensorFlow y Hub ---
-try:
-    import tensorflow as tf
-    import tensorflow_hub as hub
-    MOVENET_MODEL = hub.load("https://tfhub.dev/google/movenet/multipose/lightning/1")
-    INPUT_SIZE = 256
-    print("✅ Modelo MoveNet MultiPose cargado exitosamente.")
-except ImportError:
-    print("🚨 ADVERTENCIA: TensorFlow no está instalado. El monitoreo de pose y gestos no funcionará.")
-    MOVENET_MODEL = None
-    INPUT_SIZE = 0
+# --- TensorFlow y MoveNet se cargan bajo demanda (ver _load_movenet_model) ---
+tf = None
+MOVENET_MODEL = None
+INPUT_SIZE = 256
 
 # --- Configuración Inicial y Variables Globales ---
 REGISTRO_FACIAL_DIR = "rostros_registrados"
 os.makedirs(REGISTRO_FACIAL_DIR, exist_ok=True)
-init_db()
 
 # --- Variables de Control y Hilos ---
 attendance_monitoring_active = False
@@ -58,9 +50,10 @@ KEYPOINT_DICT = { 'nose': 0, 'left_eye': 1, 'right_eye': 2, 'left_ear': 3, 'righ
 EDGES = [ (0, 1), (0, 2), (1, 3), (2, 4), (0, 5), (0, 6), (5, 7), (7, 9), (6, 8),
     (8, 10), (5, 6), (5, 11), (6, 12), (11, 12), (11, 13), (13, 15), (12, 14), (14, 16) ]
 
-# --- Funciones de Lógica Principal (Sin cambios) ---
-def get_current_attendance_period():
-    now = datetime.datetime.now()
+# --- Funciones de Lógica Principal ---
+def get_current_attendance_period(now=None):
+    # 'now' permite evaluar la marca de tiempo de un video grabado en lugar de la hora actual
+    if now is None: now = datetime.datetime.now()
     if not (0 <= now.weekday() <= 3): return None, "Hoy no hay clases."
     for name, start_str, end_str in PERIODOS_REGISTRO:
         start_time = datetime.datetime.strptime(start_str, "%H:%M").time()
@@ -101,14 +94,36 @@ def register_student_from_camera(student_id, nombre, apellido):
         return f"Estudiante '{nombre}' registrado exitosamente."
     return "Registro fallido. No se capturaron suficientes rostros."
 
-# --- Monitoreo de ASISTENCIA (VERSIÓN FINAL CON VISUALIZACIÓN) ---
-def _run_attendance_monitoring_loop():
-    global attendance_monitoring_active
-    
+# --- Reconocimiento facial compartido (monitoreo en vivo y procesamiento offline) ---
+def _load_known_faces():
     students_data = get_all_students()
     known_face_encodings = [emb for s in students_data for emb in s['embeddings']]
     # Creamos una lista paralela con nombres para la visualización
     known_face_metadata = [{'id': s['id'], 'nombre': s['nombre']} for s in students_data for _ in s['embeddings']]
+    return known_face_encodings, known_face_metadata
+
+def _recognize_faces(frame, known_face_encodings, known_face_metadata):
+    """Detecta rostros en un frame BGR (a 1/4 de resolución) y devuelve sus ubicaciones y metadatos (None si es desconocido)."""
+    small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
+    rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+    
+    # Detecta rostros y calcula sus encodings en el frame pequeño
+    face_locations = face_recognition.face_locations(rgb_small_frame)
+    face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+    
+    face_matches = []
+    for face_encoding in face_encodings:
+        matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.6)
+        face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
+        best_match_index = np.argmin(face_distances)
+        face_matches.append(known_face_metadata[best_match_index] if matches[best_match_index] else None)
+    return face_locations, face_matches
+
+# --- Monitoreo de ASISTENCIA (VERSIÓN FINAL CON VISUALIZACIÓN) ---
+def _run_attendance_monitoring_loop():
+    global attendance_monitoring_active
+    
+    known_face_encodings, known_face_metadata = _load_known_faces()
 
     if not known_face_encodings:
         print("🚨 No hay rostros registrados. Registre estudiantes primero.")
@@ -142,23 +157,11 @@ def _run_attendance_monitoring_loop():
             if time.time() - last_process_time > PROCESS_INTERVAL:
                 last_process_time = time.time()
                 
-                small_frame = cv2.resize(frame_display, (0, 0), fx=0.25, fy=0.25)
-                rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                
-                # Detecta rostros y calcula sus encodings en el frame pequeño
-                current_face_locations = face_recognition.face_locations(rgb_small_frame)
-                current_face_encodings = face_recognition.face_encodings(rgb_small_frame, current_face_locations)
-                
-                face_locations = current_face_locations
+                face_locations, face_matches = _recognize_faces(frame_display, known_face_encodings, known_face_metadata)
                 face_names = []
-                for face_encoding in current_face_encodings:
-                    matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.6)
+                for metadata in face_matches:
                     name = "Desconocido"
-                    
-                    face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                    best_match_index = np.argmin(face_distances)
-                    if matches[best_match_index]:
-                        metadata = known_face_metadata[best_match_index]
+                    if metadata:
                         student_id = metadata['id']
                         name = metadata['nombre']
                         
@@ -198,7 +201,22 @@ def _run_attendance_monitoring_loop():
         print("Monitoreo de ASISTENCIA detenido y recursos liberados.")
 
 
-# --- Lógica de Monitoreo de Clase (Pose) OPTIMIZADA (Sin cambios) ---
+# --- Lógica de Monitoreo de Clase (Pose) OPTIMIZADA ---
+def _load_movenet_model():
+    """Importa TensorFlow y carga MoveNet la primera vez que se necesita; devuelve None si TensorFlow no está instalado."""
+    global tf, MOVENET_MODEL
+    if MOVENET_MODEL is not None: return MOVENET_MODEL
+    try:
+        import tensorflow
+        import tensorflow_hub as hub
+    except ImportError:
+        print("🚨 ADVERTENCIA: TensorFlow no está instalado. El monitoreo de pose y gestos no funcionará.")
+        return None
+    tf = tensorflow
+    MOVENET_MODEL = hub.load("https://tfhub.dev/google/movenet/multipose/lightning/1")
+    print("✅ Modelo MoveNet MultiPose cargado exitosamente.")
+    return MOVENET_MODEL
+
 def _run_movenet_inference(image):
     input_image = tf.expand_dims(image, axis=0)
     input_image = tf.cast(input_image, dtype=tf.int32)
@@ -228,9 +246,23 @@ def _is_hand_raised_movenet(keypoints, confidence_threshold=0.3):
     if r_wrist[2] > confidence_threshold and r_shoulder[2] > confidence_threshold and r_wrist[0] < r_shoulder[0]: return True
     return False
 
+def _find_raised_hands(keypoints_with_scores, w, h):
+    """Devuelve (zona, hip_x, hip_y) por cada persona con la mano levantada; la zona es None si está fuera de DESK_ZONES."""
+    raised = []
+    for person in np.squeeze(keypoints_with_scores):
+        if person[55] < 0.35: continue
+        keypoints = person[:51].reshape((17, 3))
+        l_hip, r_hip = keypoints[KEYPOINT_DICT['left_hip']], keypoints[KEYPOINT_DICT['right_hip']]
+        if l_hip[2] < 0.3 or r_hip[2] < 0.3: continue
+        hip_x, hip_y = int(((l_hip[1] + r_hip[1]) / 2) * w), int(((l_hip[0] + r_hip[0]) / 2) * h)
+        current_zone = next((z for z, c in DESK_ZONES.items() if c[0] < hip_x < c[2] and c[1] < hip_y < c[3]), None)
+        if _is_hand_raised_movenet(keypoints):
+            raised.append((current_zone, hip_x, hip_y))
+    return raised
+
 def _run_pose_gesture_monitoring_loop():
     global pose_monitoring_active
-    if not MOVENET_MODEL:
+    if not _load_movenet_model():
         print("🚨 Monitoreo de pose detenido: Modelo no disponible.")
         pose_monitoring_active = False
         return
@@ -258,21 +290,14 @@ def _run_pose_gesture_monitoring_loop():
                 last_inference_time = current_time
                 input_frame = cv2.resize(frame, (INPUT_SIZE, INPUT_SIZE))
                 keypoints_with_scores = _run_movenet_inference(input_frame)
-                for person in np.squeeze(keypoints_with_scores):
-                    if person[55] < 0.35: continue
-                    keypoints = person[:51].reshape((17, 3))
-                    l_hip, r_hip = keypoints[KEYPOINT_DICT['left_hip']], keypoints[KEYPOINT_DICT['right_hip']]
-                    if l_hip[2] < 0.3 or r_hip[2] < 0.3: continue
-                    hip_x, hip_y = int(((l_hip[1] + r_hip[1]) / 2) * w), int(((l_hip[0] + r_hip[0]) / 2) * h)
-                    current_zone = next((z for z, c in DESK_ZONES.items() if c[0] < hip_x < c[2] and c[1] < hip_y < c[3]), None)
-                    if _is_hand_raised_movenet(keypoints):
-                        cv2.putText(frame_display, "MANO ARRIBA", (hip_x, hip_y - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                        with desk_assignments_lock: assigned_student_id = desk_assignments.get(current_zone)
-                        if assigned_student_id:
-                            periodo, _ = get_current_attendance_period()
-                            if periodo and not has_participated_recently(assigned_student_id, periodo, 5):
-                                record_participation(assigned_student_id, periodo)
-                                print(f"✅ Participación registrada para el estudiante en {current_zone}.")
+                for current_zone, hip_x, hip_y in _find_raised_hands(keypoints_with_scores, w, h):
+                    cv2.putText(frame_display, "MANO ARRIBA", (hip_x, hip_y - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    with desk_assignments_lock: assigned_student_id = desk_assignments.get(current_zone)
+                    if assigned_student_id:
+                        periodo, _ = get_current_attendance_period()
+                        if periodo and not has_participated_recently(assigned_student_id, periodo, 5):
+                            record_participation(assigned_student_id, periodo)
+                            print(f"✅ Participación registrada para el estudiante en {current_zone}.")
             _draw_skeletons(frame_display, keypoints_with_scores)
             with desk_assignments_lock: current_assignments = desk_assignments.copy()
             for zone, coords in DESK_ZONES.items():
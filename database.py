@@ -166,6 +166,44 @@ def has_participated_recently(estudiante_id, periodo_clase, cooldown_seconds=30)
             return True
     return False
 
+def record_attendance_bulk(registros):
+    """Registra en lote asistencias (estudiante_id, periodo_clase, timestamp) en una sola transacción.
+    Es idempotente: omite las que ya existen para el mismo estudiante, período y día. Devuelve cuántas se insertaron."""
+    conn = sqlite3.connect(DATABASE_NAME)
+    cursor = conn.cursor()
+    changes_before = conn.total_changes
+    cursor.executemany("""
+        INSERT INTO asistencia (estudiante_id, timestamp, periodo_clase)
+        SELECT ?, ?, ? WHERE NOT EXISTS (
+            SELECT 1 FROM asistencia
+            WHERE estudiante_id = ? AND periodo_clase = ? AND substr(timestamp, 1, 10) = ?
+        )
+    """, [(est_id, ts, periodo, est_id, periodo, ts[:10]) for est_id, periodo, ts in registros])
+    conn.commit()
+    inserted = conn.total_changes - changes_before
+    conn.close()
+    return inserted
+
+def record_participation_bulk(registros, puntos=1, cooldown_seconds=5):
+    """Registra en lote participaciones (estudiante_id, periodo_clase, timestamp) en una sola transacción.
+    Es idempotente: como has_participated_recently, omite las que caen a menos de 'cooldown_seconds' de otra
+    participación ya registrada (en vivo o por un procesamiento anterior). Devuelve cuántas se insertaron."""
+    conn = sqlite3.connect(DATABASE_NAME)
+    cursor = conn.cursor()
+    changes_before = conn.total_changes
+    cursor.executemany("""
+        INSERT INTO participacion (estudiante_id, timestamp, periodo_clase, puntos)
+        SELECT ?, ?, ?, ? WHERE NOT EXISTS (
+            SELECT 1 FROM participacion
+            WHERE estudiante_id = ? AND periodo_clase = ?
+              AND ABS(julianday(timestamp) - julianday(?)) * 86400 < ?
+        )
+    """, [(est_id, ts, periodo, puntos, est_id, periodo, ts, cooldown_seconds) for est_id, periodo, ts in registros])
+    conn.commit()
+    inserted = conn.total_changes - changes_before
+    conn.close()
+    return inserted
+
 def get_all_students_basic_info():
     """Obtiene la ID, nombre y apellido de todos los estudiantes registrados."""
     conn = sqlite3.connect(DATABASE_NAME)
@@ -0,0 +1,269 @@
+# offline_processing.py
+# Procesamiento OFFLINE de videos de clase grabados: recupera asistencia y participación
+# de los períodos en que el monitoreo en vivo no estuvo disponible.
+import argparse
+import datetime
+import importlib.util
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+import core_logic
+from database import init_db, record_attendance_bulk, record_participation_bulk
+
+# Mismos intervalos de muestreo que los bucles en vivo de core_logic
+ATTENDANCE_INTERVAL = 1.0
+INFERENCE_INTERVAL = 0.2
+PARTICIPATION_COOLDOWN = 5
+CHUNK_SECONDS = 60
+
+# --- Estado de cada proceso trabajador (se carga una sola vez en el initializer) ---
+_worker_state = {}
+
+def _init_worker(known_face_encodings, known_face_metadata, desk_assignments, modos):
+    # El paralelismo lo dan los procesos: cada uno usa un solo hilo para no tener N×N hilos compitiendo por los núcleos
+    cv2.setNumThreads(1)
+    _worker_state['known_face_encodings'] = known_face_encodings
+    _worker_state['known_face_metadata'] = known_face_metadata
+    _worker_state['desk_assignments'] = desk_assignments
+    _worker_state['modos'] = set(modos)
+    if 'participacion' in modos:
+        # Si MoveNet no se puede cargar, este proceso sigue con la asistencia en lugar de romper todo el pool
+        try:
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(1)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+            model = core_logic._load_movenet_model()
+        except Exception as e:
+            print(f"🚨 Error al cargar MoveNet: {e}")
+            model = None
+        if not model:
+            print("🚨 Participación omitida en este proceso: Modelo no disponible.")
+            _worker_state['modos'].discard('participacion')
+
+def _frame_timestamp(inicio, frame_idx, fps):
+    return inicio + datetime.timedelta(seconds=frame_idx / fps)
+
+def _grabbed_frame_time(cap, inicio, frame_idx, fps):
+    # Las grabaciones de webcam suelen tener FPS variable: se usa la marca de tiempo del contenedor
+    # y sólo se recurre a frame/fps cuando el backend no la informa
+    pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if pos_msec > 0: return inicio + datetime.timedelta(milliseconds=pos_msec)
+    return _frame_timestamp(inicio, frame_idx, fps)
+
+def _process_chunk(video_path, inicio, fps, start_frame, end_frame):
+    """Procesa los frames [start_frame, end_frame) de un video y devuelve los eventos detectados.
+    grab() avanza por todos los frames, pero la conversión (retrieve) y la inferencia sólo se hacen en los
+    frames muestreados que caen dentro de un período de clase."""
+    modos = _worker_state['modos']
+    known_face_encodings = _worker_state['known_face_encodings']
+    known_face_metadata = _worker_state['known_face_metadata']
+    desk_assignments = _worker_state['desk_assignments']
+
+    # Los pasos se calculan sobre el índice absoluto del frame para que el muestreo no dependa del corte en chunks
+    attendance_step = max(1, round(fps * ATTENDANCE_INTERVAL))
+    pose_step = max(1, round(fps * INFERENCE_INTERVAL))
+
+    attendance_events = []
+    participation_events = []
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise OSError(f"No se pudo abrir el video '{video_path}'.")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    try:
+        for frame_idx in range(start_frame, end_frame):
+            do_attendance = 'asistencia' in modos and frame_idx % attendance_step == 0
+            do_pose = 'participacion' in modos and frame_idx % pose_step == 0
+            if not cap.grab(): break
+            if not (do_attendance or do_pose): continue
+            frame_time = _grabbed_frame_time(cap, inicio, frame_idx, fps)
+            periodo, _ = core_logic.get_current_attendance_period(frame_time)
+            if not periodo: continue
+            ret, frame = cap.retrieve()
+            if not ret: continue
+
+            # Igual que en vivo: las zonas de DESK_ZONES están definidas sobre el frame espejado
+            frame = cv2.flip(frame, 1)
+            timestamp = frame_time.isoformat()
+
+            if do_attendance:
+                _, face_matches = core_logic._recognize_faces(frame, known_face_encodings, known_face_metadata)
+                for metadata in face_matches:
+                    if metadata: attendance_events.append((metadata['id'], periodo, timestamp))
+
+            if do_pose:
+                h, w, _ = frame.shape
+                input_frame = cv2.resize(frame, (core_logic.INPUT_SIZE, core_logic.INPUT_SIZE))
+                keypoints_with_scores = core_logic._run_movenet_inference(input_frame)
+                for current_zone, _, _ in core_logic._find_raised_hands(keypoints_with_scores, w, h):
+                    assigned_student_id = desk_assignments.get(current_zone)
+                    if assigned_student_id:
+                        participation_events.append((assigned_student_id, periodo, timestamp))
+    finally:
+        cap.release()
+    return attendance_events, participation_events
+
+def _dedupe_attendance(events):
+    """Conserva la primera detección de cada estudiante por día y período."""
+    first_seen = {}
+    for est_id, periodo, ts in sorted(events, key=lambda e: e[2]):
+        first_seen.setdefault((est_id, periodo, ts[:10]), (est_id, periodo, ts))
+    return list(first_seen.values())
+
+def _dedupe_participation(events, cooldown_seconds=PARTICIPATION_COOLDOWN):
+    """Aplica el mismo enfriamiento que has_participated_recently, incluso entre chunks contiguos."""
+    last_recorded = {}
+    kept = []
+    for est_id, periodo, ts in sorted(set(events), key=lambda e: e[2]):
+        current = datetime.datetime.fromisoformat(ts)
+        last = last_recorded.get((est_id, periodo))
+        if last and (current - last).total_seconds() < cooldown_seconds: continue
+        last_recorded[(est_id, periodo)] = current
+        kept.append((est_id, periodo, ts))
+    return kept
+
+def _chunk_in_class_time(inicio, fps, start_frame, end_frame):
+    """Indica si el intervalo del segmento se solapa con algún período de PERIODOS_REGISTRO en un día de clases."""
+    chunk_start = _frame_timestamp(inicio, start_frame, fps)
+    chunk_end = _frame_timestamp(inicio, end_frame, fps)
+    # Hay solapamiento si el segmento empieza dentro de un período o si algún período empieza dentro del segmento
+    candidates = [chunk_start]
+    day = chunk_start.date()
+    while day <= chunk_end.date():
+        for _, start_str, _ in core_logic.PERIODOS_REGISTRO:
+            period_start = datetime.datetime.combine(day, datetime.datetime.strptime(start_str, "%H:%M").time())
+            if chunk_start <= period_start < chunk_end: candidates.append(period_start)
+        day += datetime.timedelta(days=1)
+    return any(core_logic.get_current_attendance_period(c)[0] for c in candidates)
+
+def _video_info(video_path):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened(): return None, None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, total_frames
+
+def _default_start_time(video_path, fps, total_frames):
+    # La fecha de modificación del archivo corresponde aproximadamente al final de la grabación
+    end = datetime.datetime.fromtimestamp(os.path.getmtime(video_path))
+    return end - datetime.timedelta(seconds=total_frames / fps)
+
+def process_recorded_videos(videos, desk_assignments=None, modos=('asistencia', 'participacion'),
+                            workers=None, chunk_seconds=CHUNK_SECONDS):
+    """Analiza videos grabados en paralelo y guarda los resultados en la base de datos.
+    'videos' es una lista de (ruta, inicio) donde inicio es el datetime del primer frame (o None para estimarlo).
+    Devuelve un resumen con los registros insertados y la velocidad respecto al tiempo real."""
+    init_db()
+    modos = set(modos)
+    # MoveNet se carga en cada proceso trabajador; aquí sólo se comprueba que TensorFlow esté instalado
+    if 'participacion' in modos and any(importlib.util.find_spec(m) is None for m in ('tensorflow', 'tensorflow_hub')):
+        print("🚨 Participación omitida: TensorFlow no está instalado.")
+        modos.discard('participacion')
+    if desk_assignments is None: desk_assignments = core_logic.get_desk_assignments()
+    if 'participacion' in modos and not any(desk_assignments.values()):
+        print("🚨 Participación omitida: No hay pupitres asignados.")
+        modos.discard('participacion')
+
+    known_face_encodings, known_face_metadata = core_logic._load_known_faces()
+    if 'asistencia' in modos and not known_face_encodings:
+        print("🚨 Asistencia omitida: No hay rostros registrados.")
+        modos.discard('asistencia')
+    if not modos:
+        return {'asistencias': 0, 'participaciones': 0, 'segundos_video': 0.0, 'segundos_procesados': 0.0,
+                'velocidad': 0.0, 'segmentos_fallidos': 0}
+
+    tasks = []
+    video_seconds = 0.0
+    for video_path, inicio in videos:
+        fps, total_frames = _video_info(video_path)
+        if total_frames is None or total_frames <= 0:
+            print(f"🚨 Error: No se pudo leer el video '{video_path}'.")
+            continue
+        if inicio is None: inicio = _default_start_time(video_path, fps, total_frames)
+        video_seconds += total_frames / fps
+        chunk_frames = max(1, int(fps * chunk_seconds))
+        for start_frame in range(0, total_frames, chunk_frames):
+            end_frame = min(start_frame + chunk_frames, total_frames)
+            if _chunk_in_class_time(inicio, fps, start_frame, end_frame):
+                tasks.append((video_path, inicio, fps, start_frame, end_frame))
+
+    if not tasks:
+        print("🚨 Ningún segmento de los videos cae dentro de un período de clase.")
+        return {'asistencias': 0, 'participaciones': 0, 'segundos_video': video_seconds, 'segundos_procesados': 0.0,
+                'velocidad': 0.0, 'segmentos_fallidos': 0}
+
+    print(f"🚀 Procesamiento OFFLINE INICIADO: {len(tasks)} segmentos de {video_seconds:.0f}s de video.")
+    start_time = time.time()
+    attendance_events, participation_events = [], []
+    failed_chunks = 0
+    processed_seconds = 0.0
+    # 'spawn' evita heredar el estado de TensorFlow/OpenCV del proceso padre
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(known_face_encodings, known_face_metadata, desk_assignments, modos)) as executor:
+        futures = {executor.submit(_process_chunk, *task): task for task in tasks}
+        # Un segmento que falla no descarta los demás: lo ya procesado se guarda igualmente
+        for future in as_completed(futures):
+            try:
+                chunk_attendance, chunk_participation = future.result()
+            except Exception as e:
+                video_path, _, _, start_frame, end_frame = futures[future]
+                print(f"🚨 Error al procesar '{video_path}' (frames {start_frame}-{end_frame}): {e}")
+                failed_chunks += 1
+                continue
+            _, _, fps, start_frame, end_frame = futures[future]
+            processed_seconds += (end_frame - start_frame) / fps
+            attendance_events.extend(chunk_attendance)
+            participation_events.extend(chunk_participation)
+
+    asistencias = record_attendance_bulk(_dedupe_attendance(attendance_events))
+    participaciones = record_participation_bulk(_dedupe_participation(participation_events), cooldown_seconds=PARTICIPATION_COOLDOWN)
+    elapsed = time.time() - start_time
+    # La velocidad sólo cuenta los segmentos realmente analizados (no los omitidos ni los fallidos)
+    velocidad = processed_seconds / elapsed if elapsed > 0 else 0.0
+    status_icon = "⚠️" if failed_chunks else "✅"
+    print(f"{status_icon} Procesamiento OFFLINE terminado en {elapsed:.1f}s: {processed_seconds:.0f}s de video analizados "
+          f"({velocidad:.1f}x tiempo real). Asistencias nuevas: {asistencias}. Participaciones nuevas: {participaciones}. "
+          f"Segmentos fallidos: {failed_chunks}.")
+    return {'asistencias': asistencias, 'participaciones': participaciones, 'segundos_video': video_seconds,
+            'segundos_procesados': processed_seconds, 'velocidad': velocidad, 'segmentos_fallidos': failed_chunks}
+
+def _parse_video_spec(spec):
+    """Separa 'ruta@inicio' en (ruta, datetime); si no hay hora válida tras la última '@', toda la cadena es la ruta."""
+    path, sep, inicio_str = spec.rpartition('@')
+    if not sep: return spec, None
+    try:
+        return path, datetime.datetime.fromisoformat(inicio_str)
+    except ValueError:
+        if os.path.exists(spec): return spec, None
+        raise SystemExit(f"Hora de inicio no válida en '{spec}'. Use 'ruta@AAAA-MM-DDTHH:MM:SS'.")
+
+def _positive_int(value):
+    number = int(value)
+    if number <= 0: raise argparse.ArgumentTypeError(f"debe ser un entero positivo: '{value}'")
+    return number
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Procesa videos de clase grabados para recuperar asistencia y participación.")
+    parser.add_argument('videos', nargs='+', help="Rutas de los videos. Use 'ruta@AAAA-MM-DDTHH:MM:SS' para indicar la hora del primer frame.")
+    parser.add_argument('--pupitre', action='append', default=[], metavar='ZONA=ID',
+                        help="Asignación de pupitre para la participación, p. ej. 'Pupitre 1=20230001'. Repetible.")
+    parser.add_argument('--solo', choices=['asistencia', 'participacion'], help="Procesa sólo un tipo de registro.")
+    parser.add_argument('--workers', type=_positive_int, default=None, help="Número de procesos (por defecto, todos los núcleos).")
+    parser.add_argument('--chunk', type=_positive_int, default=CHUNK_SECONDS, help="Duración en segundos de cada segmento.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = _parse_args()
+    videos = [_parse_video_spec(spec) for spec in args.videos]
+    desk_assignments = {zone_name: None for zone_name in core_logic.DESK_ZONES}
+    for spec in args.pupitre:
+        zone_name, _, student_id = spec.partition('=')
+        if zone_name not in core_logic.DESK_ZONES: raise SystemExit(f"Zona no válida: '{zone_name}'.")
+        desk_assignments[zone_name] = student_id
+    modos = (args.solo,) if args.solo else ('asistencia', 'participacion')
+    process_recorded_videos(videos, desk_assignments, modos, args.workers, args.chunk)
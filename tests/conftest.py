@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto viven en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Apunta database.DATABASE_NAME a una base SQLite temporal e inicializada."""
+    monkeypatch.setattr(database, 'DATABASE_NAME', str(tmp_path / 'test.db'))
+    database.init_db()
+    return database.DATABASE_NAME
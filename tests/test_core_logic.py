@@ -0,0 +1,43 @@
+import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('face_recognition')
+
+import core_logic
+
+
+def _person(hip_x, hip_y, wrist_y, shoulder_y=0.3, score=0.9):
+    """Construye una fila de MoveNet (17 keypoints y, x, confianza + caja + score) con coordenadas normalizadas."""
+    keypoints = np.zeros((17, 3))
+    for name in ('left_hip', 'right_hip'):
+        keypoints[core_logic.KEYPOINT_DICT[name]] = (hip_y, hip_x, 0.9)
+    for name in ('left_shoulder', 'right_shoulder'):
+        keypoints[core_logic.KEYPOINT_DICT[name]] = (shoulder_y, hip_x, 0.9)
+    for name in ('left_wrist', 'right_wrist'):
+        keypoints[core_logic.KEYPOINT_DICT[name]] = (wrist_y, hip_x, 0.9)
+    person = np.zeros(56)
+    person[:51] = keypoints.flatten()
+    person[55] = score
+    return person
+
+
+def test_find_raised_hands_maps_hips_to_desk_zones():
+    keypoints_with_scores = np.zeros((1, 6, 56))
+    keypoints_with_scores[0, 0] = _person(0.25, 0.5, wrist_y=0.1)              # Pupitre 1, mano arriba
+    keypoints_with_scores[0, 1] = _person(0.7, 0.5, wrist_y=0.6)               # Pupitre 2, mano abajo
+    keypoints_with_scores[0, 2] = _person(0.7, 0.5, wrist_y=0.1, score=0.1)    # detección poco confiable
+    keypoints_with_scores[0, 3] = _person(0.95, 0.95, wrist_y=0.1)             # fuera de las zonas
+    assert core_logic._find_raised_hands(keypoints_with_scores, 640, 480) == [('Pupitre 1', 160, 240), (None, 608, 456)]
+
+
+def test_recognize_faces_on_empty_frame():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert core_logic._recognize_faces(frame, [np.zeros(128)], [{'id': '1', 'nombre': 'Ana'}]) == ([], [])
+
+
+def test_get_current_attendance_period_uses_given_time():
+    assert core_logic.get_current_attendance_period(datetime.datetime(2026, 10, 19, 8, 30)) == ('Clase 2', None)
+    assert core_logic.get_current_attendance_period(datetime.datetime(2026, 10, 23, 8, 30))[0] is None
@@ -0,0 +1,40 @@
+import sqlite3
+
+import database
+
+
+def _count(db_path, table):
+    conn = sqlite3.connect(db_path)
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_record_attendance_bulk_is_idempotent(temp_db):
+    registros = [('1', 'Clase 2', '2026-10-19T08:00:01'), ('2', 'Clase 2', '2026-10-19T08:00:02')]
+    assert database.record_attendance_bulk(registros) == 2
+    assert database.record_attendance_bulk(registros) == 0
+    # Otra hora del mismo día y período no crea una segunda asistencia
+    assert database.record_attendance_bulk([('1', 'Clase 2', '2026-10-19T09:00:00')]) == 0
+    assert database.record_attendance_bulk([('1', 'Clase 3', '2026-10-19T10:00:00')]) == 1
+    assert database.record_attendance_bulk([('1', 'Clase 2', '2026-10-20T08:00:00')]) == 1
+    assert _count(temp_db, 'asistencia') == 4
+
+
+def test_record_participation_bulk_is_idempotent(temp_db):
+    registros = [('1', 'Clase 2', '2026-10-19T08:00:01'), ('1', 'Clase 2', '2026-10-19T08:00:10'),
+                 ('2', 'Clase 2', '2026-10-19T08:00:02')]
+    assert database.record_participation_bulk(registros) == 3
+    assert database.record_participation_bulk(registros) == 0
+    assert _count(temp_db, 'participacion') == 3
+
+
+def test_record_participation_bulk_respects_cooldown_against_existing_rows(temp_db):
+    # Participación registrada en vivo antes de que se cayera la cámara
+    database.record_participation_bulk([('1', 'Clase 2', '2026-10-19T08:00:00.532811')])
+    # El video produce timestamps ligeramente distintos para el mismo gesto
+    shifted = [('1', 'Clase 2', '2026-10-19T08:00:01'), ('1', 'Clase 2', '2026-10-19T07:59:57')]
+    assert database.record_participation_bulk(shifted, cooldown_seconds=5) == 0
+    assert database.record_participation_bulk([('1', 'Clase 2', '2026-10-19T08:00:06')], cooldown_seconds=5) == 1
+    assert database.record_participation_bulk([('1', 'Clase 3', '2026-10-19T08:00:01')], cooldown_seconds=5) == 1
+    assert _count(temp_db, 'participacion') == 3
@@ -0,0 +1,124 @@
+import datetime
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip('cv2')
+pytest.importorskip('face_recognition')
+
+import cv2
+
+import core_logic
+import database
+import offline_processing
+
+
+def _timestamps(inicio, fps, frames):
+    return [offline_processing._frame_timestamp(inicio, f, fps).isoformat() for f in frames]
+
+
+def test_dedupe_attendance_keeps_first_detection_per_day_and_period():
+    events = [('1', 'Clase 2', '2026-10-19T08:05:00'), ('1', 'Clase 2', '2026-10-19T08:01:00'),
+              ('1', 'Clase 3', '2026-10-19T10:00:00'), ('1', 'Clase 2', '2026-10-20T08:02:00')]
+    assert sorted(offline_processing._dedupe_attendance(events)) == [
+        ('1', 'Clase 2', '2026-10-19T08:01:00'), ('1', 'Clase 2', '2026-10-20T08:02:00'),
+        ('1', 'Clase 3', '2026-10-19T10:00:00')]
+
+
+def test_dedupe_participation_applies_cooldown_across_chunk_boundary():
+    inicio, fps = datetime.datetime(2026, 10, 19, 8, 0), 30.0
+    chunk_frames = int(fps * 60)
+    # Un mismo gesto detectado al final de un segmento y al inicio del siguiente
+    first_chunk = [('1', 'Clase 2', ts) for ts in _timestamps(inicio, fps, [chunk_frames - 12, chunk_frames - 6])]
+    second_chunk = [('1', 'Clase 2', ts) for ts in _timestamps(inicio, fps, [chunk_frames, chunk_frames + 6])]
+    later = [('1', 'Clase 2', ts) for ts in _timestamps(inicio, fps, [chunk_frames + int(fps * 10)])]
+    # Los segmentos pueden terminar en cualquier orden
+    kept = offline_processing._dedupe_participation(later + second_chunk + first_chunk)
+    assert [ts for _, _, ts in kept] == [first_chunk[0][2], later[0][2]]
+
+
+def test_rerun_with_shifted_start_time_does_not_duplicate(temp_db):
+    events = [('1', 'Clase 2', ts) for ts in _timestamps(datetime.datetime(2026, 10, 19, 8, 0), 30.0, [0, 300, 600])]
+    shifted = [('1', 'Clase 2', ts) for ts in _timestamps(datetime.datetime(2026, 10, 19, 8, 0, 1), 30.0, [0, 300, 600])]
+    cooldown = offline_processing.PARTICIPATION_COOLDOWN
+    assert database.record_participation_bulk(offline_processing._dedupe_participation(events), cooldown_seconds=cooldown) == 3
+    assert database.record_participation_bulk(offline_processing._dedupe_participation(shifted), cooldown_seconds=cooldown) == 0
+    assert database.record_attendance_bulk(offline_processing._dedupe_attendance(events)) == 1
+    assert database.record_attendance_bulk(offline_processing._dedupe_attendance(shifted)) == 0
+
+
+def test_chunk_in_class_time():
+    monday = datetime.datetime(2026, 10, 19, 7, 55)
+    assert offline_processing._chunk_in_class_time(monday, 30.0, 0, 30 * 600)
+    assert not offline_processing._chunk_in_class_time(monday, 30.0, 0, 30 * 60)
+    assert not offline_processing._chunk_in_class_time(datetime.datetime(2026, 10, 23, 8, 0), 30.0, 0, 30 * 600)
+
+
+def test_parse_video_spec():
+    assert offline_processing._parse_video_spec('a@b.mp4@2026-10-19T08:00:00') == (
+        'a@b.mp4', datetime.datetime(2026, 10, 19, 8, 0))
+    assert offline_processing._parse_video_spec('clase.mp4') == ('clase.mp4', None)
+    with pytest.raises(SystemExit):
+        offline_processing._parse_video_spec('clase.mp4@ayer')
+
+
+def _write_clip(path, fps, frames, size=(160, 120)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i % 256, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+@pytest.fixture
+def attendance_worker(monkeypatch):
+    monkeypatch.setattr(offline_processing, '_worker_state', {})
+    seen_frames = []
+
+    def fake_recognize_faces(frame, known_face_encodings, known_face_metadata):
+        seen_frames.append(frame.shape)
+        return [(0, 1, 1, 0), (2, 3, 3, 2)], [{'id': '1', 'nombre': 'Ana'}, None]
+
+    monkeypatch.setattr(core_logic, '_recognize_faces', fake_recognize_faces)
+    offline_processing._init_worker([], [], {}, {'asistencia'})
+    return seen_frames
+
+
+def test_process_chunk_samples_from_chunk_start_with_video_timestamps(tmp_path, attendance_worker):
+    video = _write_clip(tmp_path / 'clase.avi', 10, 50)
+    inicio = datetime.datetime(2026, 10, 19, 7, 59, 58)  # lunes; Clase 2 empieza a las 08:00
+    attendance, participation = offline_processing._process_chunk(video, inicio, 10.0, 10, 50)
+    # Se muestrea 1 frame por segundo (frames 10, 20, 30, 40); el de las 07:59:59 cae fuera de clase
+    assert [(est_id, periodo) for est_id, periodo, _ in attendance] == [('1', 'Clase 2')] * 3
+    times = [datetime.datetime.fromisoformat(ts) for _, _, ts in attendance]
+    expected = [datetime.datetime(2026, 10, 19, 8, 0, s) for s in (0, 1, 2)]
+    assert all(abs((t - e).total_seconds()) < 0.05 for t, e in zip(times, expected))
+    assert participation == []
+    assert attendance_worker == [(120, 160, 3)] * 3
+
+
+def test_process_chunk_outside_class_time_skips_recognition(tmp_path, attendance_worker):
+    video = _write_clip(tmp_path / 'clase.avi', 10, 30)
+    friday = datetime.datetime(2026, 10, 23, 8, 0)
+    assert offline_processing._process_chunk(video, friday, 10.0, 0, 30) == ([], [])
+    assert attendance_worker == []
+
+
+def test_process_chunk_raises_when_video_cannot_be_opened(tmp_path, attendance_worker):
+    with pytest.raises(OSError):
+        offline_processing._process_chunk(str(tmp_path / 'no_existe.avi'), datetime.datetime(2026, 10, 19, 8, 0), 10.0, 0, 10)
+
+
+def test_init_worker_keeps_attendance_when_movenet_is_unavailable(monkeypatch):
+    monkeypatch.setattr(offline_processing, '_worker_state', {})
+    monkeypatch.setitem(sys.modules, 'tensorflow', None)
+    offline_processing._init_worker([], [], {}, {'asistencia', 'participacion'})
+    assert offline_processing._worker_state['modos'] == {'asistencia'}
+
+
+def test_positive_int_rejects_zero_and_negative():
+    assert offline_processing._positive_int('4') == 4
+    for value in ('0', '-2'):
+        with pytest.raises(Exception):
+            offline_processing._positive_int(value)